@@ -1,8 +1,137 @@
-import re
+import collections
 import os
 import colorama # Import the colorama library
 import sys      # Import the sys module to access command-line arguments
 
+# Digits allowed in a lowercased hex color code (e.g., #f00 or #ff00ff)
+_HEX_DIGITS = "0123456789abcdef"
+# Characters allowed in a ((color <color_name_or_hex>)) tag argument
+_COLOR_NAME_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789#"
+
+# Maximum number of lines kept in the session history; older lines are dropped first
+_SESSION_HISTORY_LIMIT = 10000
+
+# Control commands that execute immediately even in compiler mode (a tuple, so one startswith call checks them all)
+_CONTROL_PREFIXES = ("execute", "help", "save", "open", "int", "comp", "exit")
+
+# Help guide printed by the 'help' command, written out in a single call
+_HELP_TEXT = """
+----------------------------------------------------------------
+                 Welcome to ZCLI! Help Guide
+----------------------------------------------------------------
+Commands:
+  define <variable_name> "<value>"
+    - Defines a new variable with a literal string value.
+    Example: define myVar "Hello ZCLI!"
+
+  define <variable_name> ((input))
+    - Defines a new variable with the last input received from a 'show input' command.
+    - Does NOT prompt for new input.
+    Example: define userName ((input))
+
+  define <variable_name> <part1> : <part2> : ...
+    - Defines a new variable by concatenating multiple parts.
+    - Parts can be literal strings, ((input)), or (variable_name).
+    Example: define fullName (firstName) : " " : (lastName)
+
+  show "<literal_string>" or show (<variable_name>)
+    - Prints a literal string or the value of a variable.
+    - Supports concatenation with ':' (e.g., show "Hello" : (myVar) : "!")
+    - Supports optional color tag at the end: ((color <color_name_or_hex>))
+    Example: show "This is a literal string." ((color red))
+    Example: show (myVar) ((color blue))
+    Example: show "Your name is: " : (userName)
+
+  show input ["<prompt_string>"]
+    - Prompts for user input with an optional custom message.
+    - The input received is stored for 'define ((input))' and 'show ((input))'.
+    - Does NOT print the input directly after prompting.
+    Example: show input (prompts for input with no message)
+    Example: show input "What is your name? " (prompts with custom message)
+
+  show ((input))
+    - Prints the last input received from a 'show input' command.
+    - Does NOT prompt for new input.
+    Example: show ((input))
+    Supported named colors: red, orange, yellow, green, blue, indigo, violet, purple, cyan, white, black.
+    Note: Hex color codes (e.g., #FF00FF) are recognized but may not display correctly in all terminals.
+
+  $ <comment_text>
+    - Adds a comment. Lines starting with '$' are ignored.
+    Example: $ This is a comment about my code.
+
+  save <filename>
+    - Saves the current program (if in compiler mode) or session history
+      (if in interpreter mode) to the specified file. Automatically adds '.zcli' extension.
+    Example: save myprogram (will save as myprogram.zcli)
+
+  open <filename.zcli>
+    - Loads commands from the specified file.
+    - In compiler mode: Appends lines to the current program buffer.
+    - In interpreter mode: Executes lines immediately.
+    Example: open myprogram.zcli
+
+  execute
+    - (Compiler Mode Only) Executes all stored program lines.
+    Example: execute
+
+  int
+    - Switches ZCLI to interpreter mode. Commands execute immediately.
+    Example: int
+
+  comp
+    - Switches ZCLI to compiler mode. Commands are stored for 'execute'.
+    Example: comp
+
+  exit
+    - Exits the ZCLI environment.
+----------------------------------------------------------------
+
+"""
+
+# The ZCLI command each opcode was compiled from, for runtime error messages
+_OPCODE_COMMANDS = {
+    "DEFINE": "define",
+    "SHOW": "show",
+    "SHOW_INPUT": "show",
+}
+
+class _ProgramReadError(IOError):
+    """
+    Raised when reading or decoding a program file fails while its lines are being streamed.
+    Lets _run_program tell file errors, which _open_program reports, apart from runtime errors.
+    """
+
+def _iter_program_lines(f):
+    """
+    Yields the non-empty lines of an open program file, each stripped only once.
+    """
+    try:
+        for line in f:
+            stripped = line.strip()
+            if stripped:
+                yield stripped
+    except (IOError, UnicodeDecodeError) as e:
+        raise _ProgramReadError(str(e)) from e
+
+def _split_color_tag(line):
+    """
+    Splits a trailing ((color <color_name_or_hex>)) tag off a line without using the regex engine.
+    Returns (processed_line, color_name_or_hex), where color_name_or_hex is None if no tag is present.
+    """
+    stripped = line.rstrip()
+    # Nearly every line has no color tag, so bail out before doing any further work
+    if stripped.endswith("))"):
+        idx = stripped.rfind("((color")
+        if idx != -1:
+            color_argument = stripped[idx + 7:-2]
+            # 'color' must be followed by whitespace, then a non-empty name or hex code
+            if color_argument[:1].isspace():
+                color_argument = color_argument.lstrip()
+                if color_argument and not color_argument.strip(_COLOR_NAME_CHARS):
+                    return stripped[:idx].strip(), color_argument
+    return line.strip(), None
+
 class ZCLILanguage:
     """
     Implements the ZCLI programming language interpreter and compiler.
@@ -35,44 +164,73 @@ class ZCLILanguage:
         self.program_lines = []
         # Current operating mode: "compiler" (default) or "interpreter"
         self.mode = "compiler"
-        # Stores a history of all commands entered in the current session
-        self.session_history = []
+        # Stores a history of the commands entered in interpreter mode, for 'save' in interpreter mode
+        self.session_history = collections.deque(maxlen=_SESSION_HISTORY_LIMIT)
         # Stores the last input received from a 'show input' command
         self.last_input_value = None
+        # Prompts the user for input; the builtin is bound directly so no wrapper frame is needed,
+        # but it can still be replaced on an instance (e.g., to feed input from elsewhere)
+        self._get_user_input = input
+        # Maps each command name to its handler, so a line is dispatched with a single dict lookup
+        self._dispatch = {
+            "define": self._cmd_define,
+            "show": self._cmd_show,
+            "help": self._cmd_help,
+            "save": self._cmd_save,
+            "open": self._cmd_open,
+            "execute": self._cmd_execute,
+            "int": self._cmd_int,
+            "comp": self._cmd_comp,
+        }
+        # Maps command names to their compilers for program execution; other commands compile to nothing
+        self._compilers = {
+            "define": self._compile_define,
+            "show": self._compile_show,
+            "execute": self._compile_ignored,
+            "int": self._compile_ignored,
+            "comp": self._compile_ignored,
+        }
+        # Maps each opcode to the method that executes it
+        self._op_handlers = {
+            "DEFINE": self._op_define,
+            "SHOW": self._op_show,
+            "SHOW_INPUT": self._op_show_input,
+            "ERROR": self._op_error,
+        }
+        # Compiled instructions for program_lines, filled in lazily by 'execute'
+        self._compiled_program = []
 
     def _get_ansi_color_code(self, color_name_or_hex):
         """
-        Returns the ANSI escape code for a given color name or hex code using Colorama.
-        Hex code support is limited to basic terminal capabilities and will fall back.
+        Returns the ANSI escape code for a given color name using Colorama.
+        Hex codes and unknown colors return an empty string, meaning no color is applied.
         """
-        color_name_or_hex_lower = color_name_or_hex.lower()
-        if color_name_or_hex_lower in self.ANSI_COLORS:
-            return self.ANSI_COLORS[color_name_or_hex_lower]
-        elif re.match(r'^#([0-9a-f]{3}){1,2}$', color_name_or_hex_lower):
-            # For hex codes (e.g., #FF00FF or #F00), standard ANSI terminals don't support direct hex.
-            # We'll print a warning and return an empty string, meaning no color is applied.
-            print(f"Warning: Hex color '{color_name_or_hex}' is not fully supported in this basic terminal environment. Displaying with default color.")
-            return ""
-        return "" # Return empty string if color not found or supported
+        return self.ANSI_COLORS.get(color_name_or_hex.lower(), "")
 
-    def _get_user_input(self, prompt=""):
+    def _warn_unsupported_color(self, color_name_or_hex):
         """
-        Prompts the user for input and returns it.
+        Prints a warning if an unresolved color tag is a hex code.
+        Only called while parsing a line, never when a compiled instruction runs.
         """
-        return input(prompt)
+        color_name_or_hex_lower = color_name_or_hex.lower()
+        if (len(color_name_or_hex_lower) in (4, 7) and color_name_or_hex_lower[0] == '#'
+                and not color_name_or_hex_lower[1:].strip(_HEX_DIGITS)):
+            # For hex codes (e.g., #FF00FF or #F00), standard ANSI terminals don't support direct hex.
+            print(f"Warning: Hex color '{color_name_or_hex}' is not fully supported in this basic terminal environment. Displaying with default color.")
 
-    def _parse_and_execute_line(self, line, is_runtime_execution=False):
+    def _parse_and_execute_line(self, line, _pre_parsed=None):
         """
-        Parses and executes a single line of ZCLI code.
+        Parses and executes a single line of ZCLI code entered directly by the user.
         This function now handles 'show input' and 'show ((input))' for both
         interpreter and compiled execution, ensuring input prompts appear only
         during execution.
-        If is_runtime_execution is True, it means this is part of a program execution,
-        and certain commands (like 'execute', 'save', 'open', 'int', 'comp') are ignored
-        to prevent unexpected behavior or infinite loops.
+        Program execution does not come through here: programs are compiled with
+        _compile_line, and _compilers decides which commands are ignored at runtime.
+        _pre_parsed is the (processed_line, color_name_or_hex) result of _split_color_tag(line),
+        when the caller has already computed it.
         """
-        # Add to session history only if it's a direct user input, not during program execution
-        if not is_runtime_execution:
+        # Compiler mode saves program_lines instead, so history is only kept in interpreter mode.
+        if self.mode != "compiler":
             self.session_history.append(line)
 
         # Ignore lines that are empty or start with the comment character '$'
@@ -81,17 +239,13 @@ class ZCLILanguage:
 
         # --- Color Tag Parsing ---
         color_code = ""
-        # Regex to find ((color <color_name_or_hex>)) at the end of the line, allowing for optional spaces
-        color_tag_pattern = r'\s*\(\(color\s+([a-zA-Z0-9#]+)\)\)\s*$'
-        color_match = re.search(color_tag_pattern, line)
-
-        if color_match:
-            color_name_or_hex = color_match.group(1) # Extract the color argument (e.g., "red", "#FF00FF")
+        if _pre_parsed is None:
+            _pre_parsed = _split_color_tag(line)
+        processed_line, color_name_or_hex = _pre_parsed
+        if color_name_or_hex is not None:
             color_code = self._get_ansi_color_code(color_name_or_hex)
-            # Remove the color tag from the line before parsing the command
-            processed_line = re.sub(color_tag_pattern, '', line).strip()
-        else:
-            processed_line = line.strip()
+            if not color_code:
+                self._warn_unsupported_color(color_name_or_hex)
 
         # Split the processed line into parts: command, variable/target, and value (if any)
         parts = processed_line.split(maxsplit=2)
@@ -99,277 +253,356 @@ class ZCLILanguage:
         if not parts: # Handle case where line becomes empty after removing color tag
             return
 
-        command = parts[0].lower() # The first word is the command
+        command = sys.intern(parts[0].lower()) # The first word is the command, interned for the dispatch lookup
 
         try: # Added try-except block for general command execution errors
-            if command == "define":
-                # Syntax: define <variable_name> "<value>" or define <variable_name> ((input)) or define <var> <part1> : <part2>
-                if len(parts) >= 2: # At least "define varname"
-                    var_name = parts[1]
-                    if len(parts) < 3: # If no value part is provided
-                        print("Error: Invalid define syntax. Missing value. Use: define variablename \"value\" or define variablename ((input)) or define <var> <part1> : <part2>")
-                        return
-
-                    # Get the full argument string for the value part
-                    full_value_argument = processed_line[len("define") + len(var_name) + 1:].strip()
-
-                    # Split by ':' to find concatenation parts
-                    concatenation_parts = [p.strip() for p in re.split(r'\s*:\s*', full_value_argument)]
-
-                    evaluated_value_parts = []
-                    for part in concatenation_parts:
-                        if not part: # Handle empty parts from splitting (e.g., "a::b")
-                            continue
-
-                        if part.startswith('"') and part.endswith('"'):
-                            evaluated_value_parts.append(part[1:-1]) # Extract literal string
-                        elif part.lower() == "((input))":
-                            if self.last_input_value is not None:
-                                evaluated_value_parts.append(self.last_input_value) # Use last input
-                            else:
-                                print("Error: No input has been provided yet via 'show input' for 'define ((input))'.")
-                                return
-                        elif part.startswith('(') and part.endswith(')'):
-                            # Handle (variable_name) or ((variable_name))
-                            var_name_in_paren = part[1:-1] # Remove outer parentheses
-                            # If it's still wrapped in parentheses, remove inner ones too
-                            if var_name_in_paren.startswith('(') and var_name_in_paren.endswith(')'):
-                                var_name_in_paren = var_name_in_paren[1:-1]
-                            
-                            if var_name_in_paren in self.variables:
-                                evaluated_value_parts.append(self.variables[var_name_in_paren]) # Get variable's value
-                            else:
-                                print(f"Error: Variable '{var_name_in_paren}' not defined in define concatenation.")
-                                return
-                        else:
-                            print(f"Error: Invalid element '{part}' in define value concatenation. Must be a quoted string, ((input)), or (variable).")
-                            return
-
-                    value_to_store = "".join(evaluated_value_parts)
-                    self.variables[var_name] = value_to_store
-                    if not is_runtime_execution:
-                        print(f"Defined variable '{var_name}' with value '{self.variables[var_name]}'")
-                else:
-                    print("Error: Invalid define syntax. Use: define variablename \"value\" or define variablename ((input)) or define <var> <part1> : <part2>")
-            elif command == "show":
-                # Syntax: show "<literal_string>" or show (<variable_name>) or show input ["<prompt_string>"] or show ((input))
-                if len(parts) < 2:
-                    print("Error: Invalid show syntax. Use: show \"literal string\", show (variablename), show input [\"prompt\"], show ((input)), or use concatenation with ':'")
-                    return
-
-                # Store the final content to show, which might be empty if only prompting
-                content_to_print = ""
-                
-                # Check for 'show input' or 'show ((input))' as primary targets first
-                # These should not be part of concatenation initially, but standalone 'show' commands.
-                if parts[1].lower() == "input": # Handles 'show input ["prompt"]'
-                    input_prompt = "" # Default prompt is empty
-                    if len(parts) >= 3: # Check if a custom prompt is provided
-                        prompt_part = parts[2]
-                        if prompt_part.startswith('"') and prompt_part.endswith('"'):
-                            input_prompt = prompt_part[1:-1] # Use custom quoted prompt
-                        else:
-                            print("Error: Invalid show input syntax. Prompt must be a quoted string.")
-                            return
-                    user_input_val = self._get_user_input(input_prompt) # Get input
-                    self.last_input_value = user_input_val # Store the input
-                    # Do NOT set content_to_print here, as we don't want to print it immediately
-                    # The intent is to just prompt and store.
-                elif parts[1].lower() == "((input))": # Handles 'show ((input))'
-                    if self.last_input_value is not None:
-                        content_to_print = self.last_input_value # Retrieve and print last input
-                    else:
-                        print("Error: No input has been provided yet via 'show input' for 'show ((input))'.")
-                        return
-                else:
-                    # If it's not 'show input' or 'show ((input))', then proceed with concatenation parsing
-                    # Get the full argument string after "show"
-                    # This allows parsing of concatenated parts, excluding the "show" command itself
-                    full_show_argument = processed_line[len("show"):].strip()
-
-                    # Split by ':' to find concatenation parts
-                    # Use re.split to handle spaces around ':'
-                    concatenation_parts = [p.strip() for p in re.split(r'\s*:\s*', full_show_argument)]
-
-                    final_output_content_parts = []
-                    for part in concatenation_parts:
-                        if not part: # Handle empty parts from splitting (e.g., "a::b")
-                            continue
-
-                        if part.startswith('"') and part.endswith('"'):
-                            final_output_content_parts.append(part[1:-1]) # Extract literal string (without quotes)
-                        elif part.startswith('(') and part.endswith(')'):
-                            # Handle show (variable_name) or ((variable_name))
-                            var_name_in_paren = part[1:-1] # Remove outer parentheses
-                            # If it's still wrapped in parentheses, remove inner ones too
-                            if var_name_in_paren.startswith('(') and var_name_in_paren.endswith(')'):
-                                var_name_in_paren = var_name_in_paren[1:-1]
-                            
-                            if var_name_in_paren in self.variables:
-                                final_output_content_parts.append(self.variables[var_name_in_paren]) # Get variable's value
-                            else:
-                                print(f"Error: Variable '{var_name_in_paren}' not defined in concatenation.")
-                                return # Exit function if variable not found
-                        # IMPORTANT: 'input' and '((input))' should NOT be directly handled here
-                        # if they are part of a concatenation, as their primary forms are handled above.
-                        # If they appear in concatenation, they would be treated as literal strings or error.
-                        # For this scope, we assume 'input' and '((input))' are top-level show arguments.
-                        else:
-                            # If it's not a recognized type within concatenation, it's an error
-                            print(f"Error: Invalid element '{part}' in show concatenation. Must be a quoted string or (variable).")
-                            return
-
-                    content_to_print = "".join(final_output_content_parts)
-
-                # Only print if content_to_print is not empty (i.e., not a pure 'show input' command)
-                if content_to_print or parts[1].lower() != "input": # Ensure we don't print for pure 'show input'
-                    print(f"{color_code}{content_to_print}{self.ANSI_RESET}")
-            elif command == "help":
-                if not is_runtime_execution: # Help is a meta-command, not typically part of a program
-                    self._print_help()
-            elif command == "save":
-                if not is_runtime_execution: # Save is a meta-command
-                    if len(parts) >= 2:
-                        filename = parts[1]
-                        self._save_program(filename)
-                    else:
-                        print("Error: Invalid save syntax. Use: save filename")
-            elif command == "open":
-                if not is_runtime_execution: # Open is a meta-command
-                    if len(parts) >= 2:
-                        filename = parts[1]
-                        self._open_program(filename)
-                    else:
-                        print("Error: Invalid open syntax. Use: open filename.zcli")
-            elif command == "execute":
-                if not is_runtime_execution: # Execute is a meta-command
-                    if self.mode == "compiler":
-                        if not self.program_lines:
-                            print("No program lines to execute. Add commands in compiler mode first.")
-                            return
-                        print("\n--- Executing ZCLI Program ---")
-                        # Temporarily switch to interpreter mode for execution
-                        original_mode = self.mode
-                        self.mode = "interpreter"
-                        self._run_program_lines(self.program_lines) # This is where compiled lines are run
-                        self.mode = original_mode # Restore original mode
-                        print("--- Program Execution Complete ---\n")
-                    else:
-                        print("Error: 'execute' command is only available in compiler mode.")
-                else:
-                    # Ignore 'execute' if called from within a running program
-                    print("Warning: 'execute' command ignored during program execution.")
-            elif command == "int":
-                if not is_runtime_execution:
-                    self.mode = "interpreter"
-                    print("Switched to interpreter mode. Commands will be executed immediately.")
-                else:
-                    print("Warning: 'int' command ignored during program execution.")
-            elif command == "comp":
-                if not is_runtime_execution:
-                    self.mode = "compiler"
-                    print("Switched to compiler mode. Commands will be stored for 'execute'.")
-                else:
-                    print("Warning: 'comp' command ignored during program execution.")
+            handler = self._dispatch.get(command)
+            if handler:
+                handler(parts, processed_line, color_code)
             else:
                 # If the command is not recognized
-                if not is_runtime_execution: # Only show error if direct user input
-                    print(f"Error: Unknown command '{command}'. Type 'help' for commands.")
+                print(f"Error: Unknown command '{command}'. Type 'help' for commands.")
         except Exception as e:
             print(f"Runtime Error during command '{command}': {e}")
-            # If it's a runtime error during compiled execution, we should probably stop.
-            if is_runtime_execution:
-                print("Program execution halted due to the above error.")
-                sys.exit(1) # Exit with an error code
+
+    def _cmd_define(self, parts, processed_line, color_code):
+        """Handles 'define': stores a literal, ((input)), (variable) or concatenated value in a variable."""
+        error = self._exec_op(self._compile_define(parts, processed_line, color_code))
+        if error:
+            print(error)
+        else:
+            print(f"Defined variable '{parts[1]}' with value '{self.variables[parts[1]]}'")
+
+    def _cmd_show(self, parts, processed_line, color_code):
+        """Handles 'show': prints a literal, (variable), ((input)) or concatenation, or prompts with 'show input'."""
+        error = self._exec_op(self._compile_show(parts, processed_line, color_code))
+        if error:
+            print(error)
+
+    def _cmd_help(self, parts, processed_line, color_code):
+        """Handles 'help': prints the help guide."""
+        self._print_help()
+
+    def _cmd_save(self, parts, processed_line, color_code):
+        """Handles 'save': saves the program buffer or session history to a file."""
+        if len(parts) >= 2:
+            filename = parts[1]
+            self._save_program(filename)
+        else:
+            print("Error: Invalid save syntax. Use: save filename")
+
+    def _cmd_open(self, parts, processed_line, color_code):
+        """Handles 'open': loads or executes a ZCLI program file."""
+        if len(parts) >= 2:
+            filename = parts[1]
+            self._open_program(filename)
+        else:
+            print("Error: Invalid open syntax. Use: open filename.zcli")
+
+    def _cmd_execute(self, parts, processed_line, color_code):
+        """Handles 'execute': runs the stored program lines (compiler mode only)."""
+        if self.mode == "compiler":
+            if not self.program_lines:
+                print("No program lines to execute. Add commands in compiler mode first.")
+                return
+            print("\n--- Executing ZCLI Program ---")
+            # Temporarily switch to interpreter mode for execution
+            original_mode = self.mode
+            self.mode = "interpreter"
+            self._run_program(self._iter_compiled_program()) # Compiles new lines, then runs the program
+            self.mode = original_mode # Restore original mode
+            print("--- Program Execution Complete ---\n")
+        else:
+            print("Error: 'execute' command is only available in compiler mode.")
+
+    def _cmd_int(self, parts, processed_line, color_code):
+        """Handles 'int': switches to interpreter mode."""
+        self.mode = "interpreter"
+        print("Switched to interpreter mode. Commands will be executed immediately.")
+
+    def _cmd_comp(self, parts, processed_line, color_code):
+        """Handles 'comp': switches to compiler mode."""
+        self.mode = "compiler"
+        print("Switched to compiler mode. Commands will be stored for 'execute'.")
+
+    # --- Compilation ---
+    # Program lines are lowered once to instruction tuples of the form (opcode, operands...):
+    #   ("DEFINE", var_name, operands)   - evaluate operands and store the result in var_name
+    #   ("SHOW", operands, color_code)   - evaluate operands and print the result in the pre-resolved color
+    #   ("SHOW_INPUT", prompt)           - prompt for input and store it for ((input))
+    #   ("ERROR", message)               - print a syntax error or warning found while compiling
+    # Operands are ("LIT", text), ("VAR", var_name), ("INPUT", None) or ("ERROR", message).
+
+    def _compile_line(self, line):
+        """
+        Compiles a single line of ZCLI code to an instruction tuple.
+        Color tags, command names and concatenation parts are parsed here, so executing
+        the instruction does no string parsing at all.
+        Returns None for lines that do nothing during program execution (comments,
+        'help', 'save', 'open' and unknown commands).
+        """
+        # Ignore lines that are empty or start with the comment character '$'
+        if not line.strip() or line.strip().startswith('$'):
+            return None
+
+        processed_line, color_name_or_hex = _split_color_tag(line)
+        color_code = ""
+        if color_name_or_hex is not None:
+            color_code = self._get_ansi_color_code(color_name_or_hex)
+            if not color_code:
+                self._warn_unsupported_color(color_name_or_hex)
+
+        parts = processed_line.split(maxsplit=2)
+        if not parts: # Handle case where line becomes empty after removing color tag
+            return None
+
+        compiler = self._compilers.get(sys.intern(parts[0].lower()))
+        if compiler:
+            return compiler(parts, processed_line, color_code)
+        return None
+
+    def _compile_define(self, parts, processed_line, color_code):
+        """
+        Compiles 'define' to ("DEFINE", var_name, operands).
+        """
+        # Syntax: define <variable_name> "<value>" or define <variable_name> ((input)) or define <var> <part1> : <part2>
+        if len(parts) < 2:
+            return ("ERROR", "Error: Invalid define syntax. Use: define variablename \"value\" or define variablename ((input)) or define <var> <part1> : <part2>")
+        # Variable names are interned so lookups in self.variables hit the identity fast path
+        var_name = sys.intern(parts[1])
+        if len(parts) < 3: # If no value part is provided
+            return ("ERROR", "Error: Invalid define syntax. Missing value. Use: define variablename \"value\" or define variablename ((input)) or define <var> <part1> : <part2>")
+
+        # split(maxsplit=2) already left the full value argument in parts[2]
+        full_value_argument = parts[2]
+
+        # Split by ':' to find concatenation parts
+        concatenation_parts = [p.strip() for p in full_value_argument.split(':')]
+
+        operands = []
+        for part in concatenation_parts:
+            if not part: # Handle empty parts from splitting (e.g., "a::b")
+                continue
+
+            # Compare the delimiter characters directly rather than calling startswith/endswith
+            first, last = part[0], part[-1]
+            if first == '"' and last == '"':
+                operands.append(("LIT", part[1:-1])) # Extract literal string
+            elif first == '(' and last == ')':
+                # ((input)) is itself wrapped in parentheses, so only lowercase parts that could match it
+                if part.lower() == "((input))":
+                    operands.append(("INPUT", None)) # Use last input
+                    continue
+                # Handle (variable_name) or ((variable_name))
+                var_name_in_paren = part[1:-1] # Remove outer parentheses
+                # If it's still wrapped in parentheses, remove inner ones too
+                if var_name_in_paren and var_name_in_paren[0] == '(' and var_name_in_paren[-1] == ')':
+                    var_name_in_paren = var_name_in_paren[1:-1]
+                operands.append(("VAR", sys.intern(var_name_in_paren)))
+            else:
+                # Reported at runtime, after the parts before it have been evaluated
+                operands.append(("ERROR", f"Error: Invalid element '{part}' in define value concatenation. Must be a quoted string, ((input)), or (variable)."))
+                break
+
+        return ("DEFINE", var_name, operands)
+
+    def _compile_show(self, parts, processed_line, color_code):
+        """
+        Compiles 'show' to ("SHOW", operands, color_code), or to ("SHOW_INPUT", prompt) for 'show input'.
+        """
+        # Syntax: show "<literal_string>" or show (<variable_name>) or show input ["<prompt_string>"] or show ((input))
+        if len(parts) < 2:
+            return ("ERROR", "Error: Invalid show syntax. Use: show \"literal string\", show (variablename), show input [\"prompt\"], show ((input)), or use concatenation with ':'")
+
+        # Check for 'show input' or 'show ((input))' as primary targets first
+        # These should not be part of concatenation initially, but standalone 'show' commands.
+        target_lower = parts[1].lower() # Lowercased once for both keyword checks
+        if target_lower == "input": # Handles 'show input ["prompt"]'
+            input_prompt = "" # Default prompt is empty
+            if len(parts) >= 3: # Check if a custom prompt is provided
+                prompt_part = parts[2]
+                if prompt_part[0] == '"' and prompt_part[-1] == '"':
+                    input_prompt = prompt_part[1:-1] # Use custom quoted prompt
+                else:
+                    return ("ERROR", "Error: Invalid show input syntax. Prompt must be a quoted string.")
+            return ("SHOW_INPUT", input_prompt)
+        elif target_lower == "((input))": # Handles 'show ((input))'
+            return ("SHOW", [("INPUT", None)], color_code)
+
+        # If it's not 'show input' or 'show ((input))', then proceed with concatenation parsing
+        # Get the full argument string after "show"
+        # This allows parsing of concatenated parts, excluding the "show" command itself
+        # (parts[1] and parts[2] can't simply be rejoined, as that would collapse spaces inside literals).
+        # processed_line is already stripped, so only the space after "show" needs removing.
+        full_show_argument = processed_line[len("show"):].lstrip()
+
+        # Split by ':' to find concatenation parts
+        # Spaces around ':' are removed by stripping each part
+        concatenation_parts = [p.strip() for p in full_show_argument.split(':')]
+
+        operands = []
+        for part in concatenation_parts:
+            if not part: # Handle empty parts from splitting (e.g., "a::b")
+                continue
+
+            # Compare the delimiter characters directly rather than calling startswith/endswith
+            first, last = part[0], part[-1]
+            if first == '"' and last == '"':
+                operands.append(("LIT", part[1:-1])) # Extract literal string (without quotes)
+            elif first == '(' and last == ')':
+                # Handle show (variable_name) or ((variable_name))
+                var_name_in_paren = part[1:-1] # Remove outer parentheses
+                # If it's still wrapped in parentheses, remove inner ones too
+                if var_name_in_paren and var_name_in_paren[0] == '(' and var_name_in_paren[-1] == ')':
+                    var_name_in_paren = var_name_in_paren[1:-1]
+                operands.append(("VAR", sys.intern(var_name_in_paren)))
+            # IMPORTANT: 'input' and '((input))' should NOT be directly handled here
+            # if they are part of a concatenation, as their primary forms are handled above.
+            # If they appear in concatenation, they would be treated as literal strings or error.
+            # For this scope, we assume 'input' and '((input))' are top-level show arguments.
+            else:
+                # If it's not a recognized type within concatenation, it's an error
+                operands.append(("ERROR", f"Error: Invalid element '{part}' in show concatenation. Must be a quoted string or (variable)."))
+                break
+
+        return ("SHOW", operands, color_code)
+
+    def _compile_ignored(self, parts, processed_line, color_code):
+        """
+        Compiles 'execute', 'int' and 'comp', which are ignored with a warning during program execution.
+        """
+        return ("ERROR", f"Warning: '{parts[0].lower()}' command ignored during program execution.")
+
+    # --- Execution ---
+
+    def _exec_op(self, op):
+        """
+        Executes a single compiled instruction.
+        Returns None on success, or an error message for the caller to print.
+        """
+        return self._op_handlers[op[0]](*op[1:])
+
+    def _evaluate_operands(self, operands, command):
+        """
+        Evaluates compiled concatenation operands to a single string.
+        Returns (value, None) on success, or (None, error_message) if an operand cannot be evaluated.
+        """
+        # Bind instance attributes to locals once, instead of looking them up on every operand
+        variables = self.variables
+        if len(operands) == 1:
+            # Most lines define or show a single literal or variable, so skip building a list to join.
+            # Anything that can fail falls through to the loop below, which reports the error.
+            kind, value = operands[0]
+            if kind == "LIT":
+                return value, None
+            if kind == "VAR" and value in variables:
+                return variables[value], None
+
+        last_input = self.last_input_value
+        evaluated_parts = []
+        for kind, value in operands:
+            if kind == "LIT":
+                evaluated_parts.append(value)
+            elif kind == "VAR":
+                if value in variables:
+                    evaluated_parts.append(variables[value]) # Get variable's value
+                else:
+                    context = "define concatenation" if command == "define" else "concatenation"
+                    return None, f"Error: Variable '{value}' not defined in {context}."
+            elif kind == "INPUT":
+                if last_input is not None:
+                    evaluated_parts.append(last_input) # Use last input
+                else:
+                    return None, f"Error: No input has been provided yet via 'show input' for '{command} ((input))'."
+            else: # "ERROR"
+                return None, value
+        return "".join(evaluated_parts), None
+
+    def _op_define(self, var_name, operands):
+        """
+        Executes a DEFINE instruction.
+        """
+        value_to_store, error = self._evaluate_operands(operands, "define")
+        if error:
+            return error
+        self.variables[var_name] = value_to_store
+        return None
+
+    def _op_show(self, operands, color_code):
+        """
+        Executes a SHOW instruction.
+        """
+        content_to_print, error = self._evaluate_operands(operands, "show")
+        if error:
+            return error
+        # color_code is the escape string resolved at compile time, so no color lookup happens here
+        sys.stdout.write(f"{color_code}{content_to_print}{self.ANSI_RESET}\n")
+        return None
+
+    def _op_show_input(self, input_prompt):
+        """
+        Executes a SHOW_INPUT instruction. The input is stored but not printed.
+        """
+        self.last_input_value = self._get_user_input(input_prompt)
+        return None
+
+    def _op_error(self, message):
+        """
+        Executes an ERROR instruction by returning its message.
+        """
+        return message
+
+    def _iter_compiled_program(self):
+        """
+        Yields the compiled instructions for the program buffer, compiling only the lines
+        added since the last 'execute'. program_lines is only ever appended to, so
+        previously compiled instructions stay valid.
+        """
+        compiled_program = self._compiled_program
+        for index, line in enumerate(self.program_lines):
+            if index == len(compiled_program):
+                compiled_program.append(self._compile_line(line))
+            yield compiled_program[index]
+
+    def _run_program(self, instructions):
+        """
+        Executes compiled instructions in order. Entries that are None (no-op lines) are skipped.
+        Errors reported by instructions are printed and execution continues; an unexpected
+        exception halts the program.
+        """
+        op_handlers = self._op_handlers
+        # The instruction currently being executed. It is reset once its handler returns, so an
+        # exception raised while compiling the next line is not blamed on the previous instruction.
+        op = None
+        # A single try around the whole loop, rather than one per instruction
+        try:
+            for op in instructions:
+                if op is None:
+                    continue
+                error = op_handlers[op[0]](*op[1:])
+                op = None
+                if error:
+                    print(error)
+        except _ProgramReadError:
+            raise # Reading a streamed program file failed; _open_program reports it
+        except Exception as e:
+            if op is not None:
+                print(f"Runtime Error during command '{_OPCODE_COMMANDS.get(op[0], op[0].lower())}': {e}")
+            else:
+                print(f"Runtime Error while compiling the program: {e}")
+            print("Program execution halted due to the above error.")
+            sys.exit(1) # Exit on first error during program execution
 
     def _run_program_lines(self, lines):
         """
-        Executes a list of ZCLI program lines, typically used by the 'execute' command
-        or when opening a file in interpreter mode.
+        Compiles and executes ZCLI program lines, typically used when opening a file
+        in interpreter mode. Lines are compiled one at a time as they are executed.
         """
-        for line in lines:
-            try: # Added try-except for individual line execution
-                # Execute each line, signaling that it's part of a runtime execution
-                self._parse_and_execute_line(line, is_runtime_execution=True)
-            except SystemExit: # Catch SystemExit if _parse_and_execute_line decided to exit
-                raise # Re-raise to stop the program
-            except Exception as e:
-                print(f"Error executing line '{line}': {e}")
-                print("Program execution halted.")
-                sys.exit(1) # Exit on first error during program execution
+        self._run_program(self._compile_line(line) for line in lines)
 
     def _print_help(self):
         """Prints the available ZCLI commands and their syntax."""
-        print("\n----------------------------------------------------------------")
-        print("                 Welcome to ZCLI! Help Guide")
-        print("----------------------------------------------------------------")
-        print("Commands:")
-        print("  define <variable_name> \"<value>\"")
-        print("    - Defines a new variable with a literal string value.")
-        print("    Example: define myVar \"Hello ZCLI!\"")
-        print("")
-        print("  define <variable_name> ((input))")
-        print("    - Defines a new variable with the last input received from a 'show input' command.")
-        print("    - Does NOT prompt for new input.")
-        print("    Example: define userName ((input))")
-        print("")
-        print("  define <variable_name> <part1> : <part2> : ...")
-        print("    - Defines a new variable by concatenating multiple parts.")
-        print("    - Parts can be literal strings, ((input)), or (variable_name).")
-        print("    Example: define fullName (firstName) : \" \" : (lastName)")
-        print("")
-        print("  show \"<literal_string>\" or show (<variable_name>)")
-        print("    - Prints a literal string or the value of a variable.")
-        print("    - Supports concatenation with ':' (e.g., show \"Hello\" : (myVar) : \"!\")")
-        print("    - Supports optional color tag at the end: ((color <color_name_or_hex>))")
-        print("    Example: show \"This is a literal string.\" ((color red))")
-        print("    Example: show (myVar) ((color blue))")
-        print("    Example: show \"Your name is: \" : (userName)")
-        print("")
-        print("  show input [\"<prompt_string>\"]")
-        print("    - Prompts for user input with an optional custom message.")
-        print("    - The input received is stored for 'define ((input))' and 'show ((input))'.")
-        print("    - Does NOT print the input directly after prompting.")
-        print("    Example: show input (prompts for input with no message)")
-        print("    Example: show input \"What is your name? \" (prompts with custom message)")
-        print("")
-        print("  show ((input))")
-        print("    - Prints the last input received from a 'show input' command.")
-        print("    - Does NOT prompt for new input.")
-        print("    Example: show ((input))")
-        print("    Supported named colors: red, orange, yellow, green, blue, indigo, violet, purple, cyan, white, black.")
-        print("    Note: Hex color codes (e.g., #FF00FF) are recognized but may not display correctly in all terminals.")
-        print("")
-        print("  $ <comment_text>")
-        print("    - Adds a comment. Lines starting with '$' are ignored.")
-        print("    Example: $ This is a comment about my code.")
-        print("")
-        print("  save <filename>")
-        print("    - Saves the current program (if in compiler mode) or session history")
-        print("      (if in interpreter mode) to the specified file. Automatically adds '.zcli' extension.")
-        print("    Example: save myprogram (will save as myprogram.zcli)")
-        print("")
-        print("  open <filename.zcli>")
-        print("    - Loads commands from the specified file.")
-        print("    - In compiler mode: Appends lines to the current program buffer.")
-        print("    - In interpreter mode: Executes lines immediately.")
-        print("    Example: open myprogram.zcli")
-        print("")
-        print("  execute")
-        print("    - (Compiler Mode Only) Executes all stored program lines.")
-        print("    Example: execute")
-        print("")
-        print("  int")
-        print("    - Switches ZCLI to interpreter mode. Commands execute immediately.")
-        print("    Example: int")
-        print("")
-        print("  comp")
-        print("    - Switches ZCLI to compiler mode. Commands are stored for 'execute'.")
-        print("    Example: comp")
-        print("")
-        print("  exit")
-        print("    - Exits the ZCLI environment.")
-        print("----------------------------------------------------------------\n")
+        sys.stdout.write(_HELP_TEXT)
 
     def _save_program(self, filename):
         """
@@ -383,13 +616,11 @@ class ZCLILanguage:
             with open(filename, 'w') as f:
                 if self.mode == "compiler":
                     # Save the program lines that have been buffered
-                    for line in self.program_lines:
-                        f.write(line + '\n')
+                    f.writelines(line + '\n' for line in self.program_lines)
                     print(f"Program (compiler buffer) saved to '{filename}'.")
                 else:
                     # Save the entire session history
-                    for line in self.session_history:
-                        f.write(line + '\n')
+                    f.writelines(line + '\n' for line in self.session_history)
                     print(f"Session history saved to '{filename}'.")
         except IOError as e:
             print(f"Error saving file '{filename}': {e}")
@@ -402,18 +633,20 @@ class ZCLILanguage:
         """
         try:
             with open(filename, 'r') as f:
-                # Read all non-empty lines from the file
-                lines = [line.strip() for line in f if line.strip()]
+                # Non-empty lines from the file, each stripped only once
+                lines = _iter_program_lines(f)
                 if self.mode == "compiler":
-                    self.program_lines.extend(lines) # Add to current program buffer
+                    # Read every line before touching the buffer, so a failed read leaves it unchanged
+                    self.program_lines.extend(list(lines)) # Add to current program buffer
                     print(f"Program lines from '{filename}' loaded into compiler buffer.")
                     print("Type 'execute' to run them.")
                 else:
                     print(f"Executing program from '{filename}' in interpreter mode...")
+                    # Lines are streamed from the file, so execution starts without reading the whole file first
                     self._run_program_lines(lines) # Execute immediately
         except FileNotFoundError:
             print(f"Error: File '{filename}' not found.")
-        except IOError as e:
+        except (IOError, UnicodeDecodeError) as e: # Includes _ProgramReadError from reading the lines
             print(f"Error opening file '{filename}': {e}")
 
     def run_repl(self, file_to_execute=None): # Added file_to_execute parameter
@@ -454,16 +687,14 @@ class ZCLILanguage:
                 # If in compiler mode, store the command for later execution,
                 # unless it's a control command that should run immediately.
                 if self.mode == "compiler":
-                    # Control commands that execute immediately even in compiler mode
-                    control_commands = ["execute", "help", "save", "open", "int", "comp", "exit"]
-                    
                     # Check if the input is a control command (ignoring color tag for this check)
-                    # This regex removes the color tag for the command check, but keeps the original for storage
-                    temp_line_for_command_check = re.sub(r'\s*\(\(color\s+([a-zA-Z0-9#]+)\)\)\s*$', '', user_input).strip()
+                    # The color tag is removed for the command check, but the original is kept for storage
+                    pre_parsed = _split_color_tag(user_input)
+                    temp_line_for_command_check = pre_parsed[0]
 
-                    if any(temp_line_for_command_check.lower().startswith(cmd) for cmd in control_commands):
-                        # If it's a control command, execute it immediately.
-                        self._parse_and_execute_line(user_input)
+                    if temp_line_for_command_check.lower().startswith(_CONTROL_PREFIXES):
+                        # If it's a control command, execute it immediately, reusing the color tag split above.
+                        self._parse_and_execute_line(user_input, _pre_parsed=pre_parsed)
                     else:
                         # Otherwise (for define, show, comments), add it to program lines.
                         self.program_lines.append(user_input)